@@ -5,11 +5,15 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+from bson.codec_options import CodecOptions, TypeDecoder, TypeRegistry
 from datetime import datetime, timezone
+import asyncio
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import List, Tuple, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
@@ -18,15 +22,48 @@ load_dotenv()
 _client = None
 db = None
 
+class ObjectIdToStrCodec(TypeDecoder):
+    """Decode ObjectIds straight to their hex string so documents are JSON-ready"""
+    bson_type = ObjectId
+
+    def transform_bson(self, value):
+        return str(value)
+
+# Only affects decoding: queries still have to pass real ObjectIds
+CODEC_OPTIONS = CodecOptions(type_registry=TypeRegistry([ObjectIdToStrCodec()]))
+
 database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
+# One pooled client per worker process, created at import and reused by every request.
+# Pool sizes are per process, so the server sees them multiplied by the worker
+# count (WEB_CONCURRENCY); keep the idle floor small.
 if database_url and database_name:
-    _client = MongoClient(database_url)
-    db = _client[database_name]
+    _client = AsyncIOMotorClient(
+        database_url,
+        maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", 200)),
+        minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", 2)),
+        maxIdleTimeMS=60000,
+        waitQueueTimeoutMS=2500,
+    )
+    db = _client.get_database(database_name, codec_options=CODEC_OPTIONS)
+
+# Upper bound on the startup ping, so an unreachable server doesn't hold every
+# worker for the driver's 30s server-selection timeout
+PING_TIMEOUT_S = float(os.getenv("MONGO_PING_TIMEOUT_S", 3))
+
+async def ping_database():
+    """Round-trip to the server so the pool is warm before the first request"""
+    if _client is not None:
+        await asyncio.wait_for(_client.admin.command("ping"), timeout=PING_TIMEOUT_S)
+
+def close_database():
+    """Close the shared client and its connection pool"""
+    if _client is not None:
+        _client.close()
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -40,16 +77,47 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+async def create_documents(collection_name: str, data: List[Union[BaseModel, dict]]) -> Tuple[List[str], List[dict]]:
+    """Insert many documents with timestamps in a single unordered batch
+
+    Returns the ids that were stored and the per-document write errors; being
+    unordered, the rest of the batch is still inserted when some items fail.
+    """
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    docs = []
+    for item in data:
+        data_dict = item.model_dump() if isinstance(item, BaseModel) else item.copy()
+        data_dict['created_at'] = now
+        data_dict['updated_at'] = now
+        docs.append(data_dict)
+
+    try:
+        result = await db[collection_name].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = [
+            {k: err[k] for k in ("index", "code", "errmsg", "keyValue") if k in err}
+            for err in e.details.get("writeErrors", [])
+        ]
+        failed = {err["index"] for err in errors}
+        # insert_many assigns _id to each document before sending it
+        inserted = [str(doc["_id"]) for i, doc in enumerate(docs) if i not in failed]
+        return inserted, errors
+    return [str(i) for i in result.inserted_ids], []
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None):
+    """Get documents from collection, optionally returning only the projected fields"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
-    cursor = db[collection_name].find(filter_dict or {})
+    cursor = db[collection_name].find(filter_dict or {}, projection=projection)
     if limit:
-        cursor = cursor.limit(limit)
-    
-    return list(cursor)
+        # Fetch the whole page in the first reply instead of 101 docs + getMore
+        cursor = cursor.limit(limit).batch_size(limit)
+
+    return await cursor.to_list(length=limit or None)
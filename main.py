@@ -1,12 +1,22 @@
+import logging
 import os
-from typing import Dict, Any, List, Type, Optional
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Callable, List, Type, Optional, Union
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter, create_model
+from pydantic.fields import FieldInfo
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+import orjson
 
-from database import db, create_document, get_documents
+from database import db, create_document, create_documents, get_documents, ping_database, close_database
 from schemas import (
     Receptionist,
     Doctor,
@@ -18,31 +28,40 @@ from schemas import (
     Consumable,
 )
 
-app = FastAPI(title="Dental Clinic Suite API")
+# ----------------------------------------------------------
+# Responses
+# ----------------------------------------------------------
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def _orjson_default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class MongoJSONResponse(ORJSONResponse):
+    """orjson response that also knows how to encode BSON ObjectIds"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default)
 
 # ----------------------------------------------------------
 # Utilities
 # ----------------------------------------------------------
 
-def serialize_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
-    if not doc:
-        return doc
-    doc = dict(doc)
-    if isinstance(doc.get("_id"), ObjectId):
-        doc["_id"] = str(doc["_id"])
-    # Convert nested ObjectIds if any
-    for k, v in list(doc.items()):
-        if isinstance(v, ObjectId):
-            doc[k] = str(v)
-    return doc
+_OID_RE = re.compile(r"[0-9a-fA-F]{24}").fullmatch
+
+def parse_object_id(doc_id: Union[str, ObjectId]) -> ObjectId:
+    """Turn a path id into an ObjectId, rejecting malformed ids with a 400"""
+    if isinstance(doc_id, ObjectId):
+        return doc_id
+    if not _OID_RE(doc_id):
+        raise HTTPException(status_code=400, detail="Invalid id")
+    return ObjectId(doc_id)
+
+def duplicate_key_error(e: DuplicateKeyError) -> HTTPException:
+    """409 naming the key that collided with a unique index"""
+    details = e.details or {}
+    key = details.get("keyValue") or details.get("keyPattern")
+    return HTTPException(status_code=409, detail={"message": "Duplicate key", "key": key})
 
 MODEL_MAP: Dict[str, Type[BaseModel]] = {
     "receptionist": Receptionist,
@@ -55,16 +74,120 @@ MODEL_MAP: Dict[str, Type[BaseModel]] = {
     "consumable": Consumable,
 }
 
+def resolve_collection(collection: str) -> str:
+    """Map a path segment to its collection name, only lowercasing on a miss"""
+    if collection in MODEL_MAP:
+        return collection
+    collection = collection.lower()
+    if collection not in MODEL_MAP:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    return collection
+
+# Power-user flag for trusted writers such as migration and import scripts:
+# with TRUSTED_WRITES=1 the write endpoints store payloads exactly as sent,
+# skipping Pydantic validation and model defaults. Never enable it on an API
+# reachable by untrusted clients.
+TRUSTED_WRITES = os.getenv("TRUSTED_WRITES") == "1"
+
+# Prebuilt validators per collection, so writes call straight into pydantic-core
+VALIDATORS: Dict[str, Callable[[Any], BaseModel]] = {
+    name: TypeAdapter(model).validate_python for name, model in MODEL_MAP.items()
+}
+
+def partial_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """Copy of a model where every field may be omitted, for partial updates"""
+    fields = {
+        name: (field.annotation, FieldInfo.merge_field_infos(field, default=None, default_factory=None))
+        for name, field in model.model_fields.items()
+    }
+    return create_model(f"{model.__name__}Update", **fields)
+
+# Validators for PUT payloads: supplied fields are checked, missing ones are left alone
+PARTIAL_VALIDATORS: Dict[str, Callable[[Any], BaseModel]] = {
+    name: TypeAdapter(partial_model(model)).validate_python for name, model in MODEL_MAP.items()
+}
+
+# Top-level names accepted by ?fields=, so only known paths reach the projection
+PROJECTABLE_FIELDS: Dict[str, frozenset] = {
+    name: frozenset(model.model_fields) | {"_id", "created_at", "updated_at"}
+    for name, model in MODEL_MAP.items()
+}
+
+# ----------------------------------------------------------
+# Lifespan
+# ----------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+async def ensure_indexes():
+    """Create the indexes each schema declares in its `_indexes` class variable"""
+    if db is None:
+        return
+    for name, model in MODEL_MAP.items():
+        indexes = getattr(model, "_indexes", None)
+        if not indexes:
+            continue
+        try:
+            await db[name].create_indexes(indexes)
+        except Exception as e:
+            logger.warning("Could not create indexes for %s: %s", name, e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await ping_database()
+    except Exception as e:
+        # Unreachable database: the ping gave up after MONGO_PING_TIMEOUT_S; skip
+        # index creation rather than wait out a server-selection timeout per collection
+        logger.warning("Database ping failed on startup: %r", e)
+    else:
+        await ensure_indexes()
+    yield
+    close_database()
+
+# ----------------------------------------------------------
+# App
+# ----------------------------------------------------------
+
+app = FastAPI(title="Dental Clinic Suite API", default_response_class=MongoJSONResponse, lifespan=lifespan)
+
+# Explicit origins (comma-separated in CORS_ORIGINS) let Starlette do an exact
+# lookup instead of the wildcard path, and are required alongside credentials
+ALLOWED_ORIGINS = frozenset(
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
+    if origin.strip()
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=list(ALLOWED_ORIGINS),
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["Content-Type", "Authorization"],
+)
+
+# Large list responses are text-heavy JSON; small ones are not worth compressing
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # ----------------------------------------------------------
 # Root & Health
 # ----------------------------------------------------------
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Dental Clinic Suite Backend is running"}
 
+# Health probes hit /test often; reuse the last result for a few seconds
+TEST_CACHE_TTL = 10.0
+_test_cache: Dict[str, Any] = {"ts": 0.0, "val": None}
+
 @app.get("/test")
-def test_database():
+async def test_database():
+    now = time.monotonic()
+    if _test_cache["val"] is not None and now - _test_cache["ts"] < TEST_CACHE_TTL:
+        return _test_cache["val"]
+
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -81,7 +204,7 @@ def test_database():
             response["database_name"] = getattr(db, "name", "") or "✅ Connected"
             response["connection_status"] = "Connected"
             try:
-                response["collections"] = db.list_collection_names()[:20]
+                response["collections"] = (await db.list_collection_names())[:20]
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
                 response["database"] = f"⚠️ Connected but Error: {str(e)[:100]}"
@@ -90,98 +213,122 @@ def test_database():
     except Exception as e:
         response["database"] = f"❌ Error: {str(e)[:100]}"
 
+    _test_cache["ts"] = now
+    _test_cache["val"] = response
     return response
 
 # ----------------------------------------------------------
 # Schema Introspection for Viewer
 # ----------------------------------------------------------
 
-@app.get("/schema")
-def get_schema_definitions():
-    defs = {}
-    for name, model in MODEL_MAP.items():
-        defs[name] = model.model_json_schema()
-    return defs
+# Models are static, so the JSON schemas are built and encoded once at import
+_SCHEMA_CACHE: Dict[str, Any] = {name: model.model_json_schema() for name, model in MODEL_MAP.items()}
+_SCHEMA_BYTES: bytes = orjson.dumps(_SCHEMA_CACHE)
+
+@app.get("/schema", response_model=None)
+async def get_schema_definitions() -> Response:
+    return Response(content=_SCHEMA_BYTES, media_type="application/json")
 
 # ----------------------------------------------------------
 # Generic CRUD Endpoints per collection
 # ----------------------------------------------------------
 
-@app.get("/api/{collection}")
-def list_documents(collection: str, limit: int = 100):
-    collection = collection.lower()
-    if collection not in MODEL_MAP:
-        raise HTTPException(status_code=404, detail="Collection not found")
-    docs = get_documents(collection, {}, min(limit, 500))
-    return [serialize_doc(d) for d in docs]
+@app.get("/api/{collection}", response_model=None)
+async def list_documents(collection: str, limit: int = 100, fields: Optional[str] = None) -> MongoJSONResponse:
+    collection = resolve_collection(collection)
+    # ?fields=a,b restricts the returned fields; _id is always included
+    projection = None
+    if fields:
+        names = {f for f in (f.strip() for f in fields.split(",")) if f}
+        unknown = names - PROJECTABLE_FIELDS[collection]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        projection = {f: 1 for f in names} or None
+    docs = await get_documents(collection, {}, max(1, min(limit, 500)), projection)
+    return MongoJSONResponse(docs)
 
-@app.get("/api/{collection}/{doc_id}")
-def get_document(collection: str, doc_id: str):
-    collection = collection.lower()
-    if collection not in MODEL_MAP:
-        raise HTTPException(status_code=404, detail="Collection not found")
-    try:
-        doc = db[collection].find_one({"_id": ObjectId(doc_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid id")
+@app.get("/api/{collection}/{doc_id}", response_model=None)
+async def get_document(collection: str, doc_id: str) -> MongoJSONResponse:
+    collection = resolve_collection(collection)
+    doc = await db[collection].find_one({"_id": parse_object_id(doc_id)})
     if not doc:
         raise HTTPException(status_code=404, detail="Not found")
-    return serialize_doc(doc)
+    return MongoJSONResponse(doc)
 
-@app.post("/api/{collection}")
-def create_new_document(collection: str, payload: dict):
-    collection = collection.lower()
-    if collection not in MODEL_MAP:
-        raise HTTPException(status_code=404, detail="Collection not found")
-    Model = MODEL_MAP[collection]
+@app.post("/api/{collection}", response_model=None)
+async def create_new_document(collection: str, payload: dict) -> MongoJSONResponse:
+    collection = resolve_collection(collection)
+    validated: Union[BaseModel, dict] = payload
+    if not TRUSTED_WRITES:
+        try:
+            validated = VALIDATORS[collection](payload)
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=str(e))
     try:
-        validated: BaseModel = Model(**payload)
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=str(e))
-    inserted_id = create_document(collection, validated)
-    doc = db[collection].find_one({"_id": ObjectId(inserted_id)})
-    return serialize_doc(doc)
+        inserted_id = await create_document(collection, validated)
+    except DuplicateKeyError as e:
+        raise duplicate_key_error(e)
+    doc = await db[collection].find_one({"_id": ObjectId(inserted_id)})
+    return MongoJSONResponse(doc)
 
-@app.put("/api/{collection}/{doc_id}")
-def update_document(collection: str, doc_id: str, payload: dict):
-    collection = collection.lower()
-    if collection not in MODEL_MAP:
-        raise HTTPException(status_code=404, detail="Collection not found")
-    Model = MODEL_MAP[collection]
-    try:
-        # Allow partial updates: validate by merging existing with payload
-        existing = db[collection].find_one({"_id": ObjectId(doc_id)})
-        if not existing:
-            raise HTTPException(status_code=404, detail="Not found")
-        merged = {k: v for k, v in existing.items() if k != "_id"}
-        merged.update(payload)
-        Model(**merged)  # validate
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=str(e))
+MAX_BULK_SIZE = 500
 
-    res = db[collection].update_one({"_id": ObjectId(doc_id)}, {"$set": payload})
-    if res.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Not found")
-    updated = db[collection].find_one({"_id": ObjectId(doc_id)})
-    return serialize_doc(updated)
+@app.post("/api/{collection}/bulk", response_model=None)
+async def bulk_create_documents(collection: str, payloads: List[dict]) -> MongoJSONResponse:
+    collection = resolve_collection(collection)
+    if len(payloads) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_SIZE} documents per batch")
+    validated: List[Union[BaseModel, dict]] = payloads
+    if not TRUSTED_WRITES:
+        validate = VALIDATORS[collection]
+        validated = []
+        for index, item in enumerate(payloads):
+            try:
+                validated.append(validate(item))
+            except Exception as e:
+                raise HTTPException(status_code=422, detail={"index": index, "error": str(e)})
+    if not validated:
+        return MongoJSONResponse({"inserted": []})
+    inserted_ids, errors = await create_documents(collection, validated)
+    if errors:
+        # Unordered insert: report what was stored alongside what failed
+        status_code = 207 if inserted_ids else 409
+        return MongoJSONResponse({"inserted": inserted_ids, "errors": errors}, status_code=status_code)
+    return MongoJSONResponse({"inserted": inserted_ids})
+
+@app.put("/api/{collection}/{doc_id}", response_model=None)
+async def update_document(collection: str, doc_id: str, payload: dict) -> MongoJSONResponse:
+    collection = resolve_collection(collection)
+    oid = parse_object_id(doc_id)
+    if not TRUSTED_WRITES:
+        try:
+            # Allow partial updates: validate only the supplied fields
+            PARTIAL_VALIDATORS[collection](payload)
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=str(e))
 
-@app.delete("/api/{collection}/{doc_id}")
-def delete_document(collection: str, doc_id: str):
-    collection = collection.lower()
-    if collection not in MODEL_MAP:
-        raise HTTPException(status_code=404, detail="Collection not found")
     try:
-        res = db[collection].delete_one({"_id": ObjectId(doc_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid id")
+        updated = await db[collection].find_one_and_update(
+            {"_id": oid}, {"$set": payload}, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError as e:
+        raise duplicate_key_error(e)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return MongoJSONResponse(updated)
+
+@app.delete("/api/{collection}/{doc_id}", response_model=None)
+async def delete_document(collection: str, doc_id: str) -> MongoJSONResponse:
+    collection = resolve_collection(collection)
+    res = await db[collection].delete_one({"_id": parse_object_id(doc_id)})
     if res.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Not found")
-    return {"deleted": True, "id": doc_id}
+    return MongoJSONResponse({"deleted": True, "id": doc_id})
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # Multiple workers need the app as an import string so each process loads its own
+    uvicorn.run("main:app", host="0.0.0.0", port=port, loop="uvloop", http="httptools", workers=workers)
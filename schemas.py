@@ -10,11 +10,20 @@ Examples:
 
 These schemas will be exposed via the /schema endpoint and are used by
 the database viewer for validation and basic CRUD.
+
+Models may declare an `_indexes` class variable listing the MongoDB
+indexes their collection needs; they are created on application startup.
 """
 
-from typing import Optional, List, Literal, Dict, Any
-from pydantic import BaseModel, Field
-from datetime import date, datetime
+from functools import partial
+from typing import Annotated, Optional, List, Literal, Dict, Any, ClassVar
+from pydantic import BaseModel, Field, StringConstraints
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from datetime import date, datetime, timezone
+
+# Checked by pydantic-core's compiled regex at validation time
+Email = Annotated[str, StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")]
+Phone = Annotated[str, StringConstraints(pattern=r"^\+?[0-9 ()./-]{5,20}$")]
 
 # ---------------------------------------------------------------------
 # Core People
@@ -22,15 +31,15 @@ from datetime import date, datetime
 
 class Receptionist(BaseModel):
     name: str = Field(..., description="Full name")
-    email: str = Field(..., description="Work email")
-    phone: Optional[str] = Field(None, description="Contact phone")
+    email: Email = Field(..., description="Work email")
+    phone: Optional[Phone] = Field(None, description="Contact phone")
     shift: Literal["morning", "evening", "night"] = Field("morning")
     is_active: bool = Field(True)
 
 class Doctor(BaseModel):
     name: str = Field(..., description="Full name")
-    email: str = Field(..., description="Work email")
-    phone: Optional[str] = Field(None)
+    email: Email = Field(..., description="Work email")
+    phone: Optional[Phone] = Field(None)
     specialization: Optional[str] = Field(None, description="e.g., Orthodontist, Endodontist")
     license_no: Optional[str] = Field(None)
     is_active: bool = Field(True)
@@ -40,8 +49,8 @@ class Patient(BaseModel):
     last_name: str
     date_of_birth: Optional[date] = Field(None)
     gender: Optional[Literal["male", "female", "other"]] = None
-    email: Optional[str] = None
-    phone: Optional[str] = None
+    email: Optional[Email] = None
+    phone: Optional[Phone] = None
     address: Optional[str] = None
     allergies: List[str] = Field(default_factory=list)
     medical_history: Optional[str] = None
@@ -55,6 +64,10 @@ class Patient(BaseModel):
 # ---------------------------------------------------------------------
 
 class Procedure(BaseModel):
+    _indexes: ClassVar[List[IndexModel]] = [
+        IndexModel([("code", ASCENDING)], unique=True),
+    ]
+
     code: str = Field(..., description="Internal or insurance code")
     name: str
     description: Optional[str] = None
@@ -62,6 +75,10 @@ class Procedure(BaseModel):
     base_fee: float = Field(..., ge=0)
 
 class Appointment(BaseModel):
+    _indexes: ClassVar[List[IndexModel]] = [
+        IndexModel([("patient_id", ASCENDING), ("start_time", DESCENDING)]),
+    ]
+
     patient_id: str = Field(..., description="Reference to patient _id")
     doctor_id: str = Field(..., description="Reference to doctor _id")
     start_time: datetime = Field(..., description="Appointment start time (UTC)")
@@ -82,12 +99,16 @@ class PaymentItem(BaseModel):
     appointment_id: Optional[str] = None
 
 class Payment(BaseModel):
+    _indexes: ClassVar[List[IndexModel]] = [
+        IndexModel([("patient_id", ASCENDING), ("date_time", DESCENDING)]),
+    ]
+
     patient_id: str = Field(..., description="Reference to patient _id")
     amount: float = Field(..., ge=0)
     method: Literal["cash", "card", "transfer", "insurance"]
     status: Literal["pending", "paid", "refunded", "failed"] = "paid"
     reference: Optional[str] = None
-    date_time: datetime = Field(default_factory=datetime.utcnow)
+    date_time: datetime = Field(default_factory=partial(datetime.now, timezone.utc))
     items: List[PaymentItem] = Field(default_factory=list)
     notes: Optional[str] = None
 